@@ -1,5 +1,6 @@
 import streamlit as st
 from src.rag_pipeline import RAGPipeline
+from src.conversation_memory import ConversationMemory
 import time
 
 # Page config
@@ -38,6 +39,12 @@ st.markdown("""
 def load_pipeline():
     return RAGPipeline()
 
+def format_source(src):
+    # Reused chunks were scored against an earlier question, so don't show that as relevance
+    if src.get('reused'):
+        return f"• {src['source']} (Page: {src['page']}, reused from previous question)"
+    return f"• {src['source']} (Page: {src['page']}, Relevance: {src['score']:.2f})"
+
 # Header
 st.markdown('<p class="main-header">🤖 Ask Himanshu</p>', unsafe_allow_html=True)
 st.markdown(
@@ -72,11 +79,21 @@ with st.sidebar:
     
     st.header("Technology Stack")
     st.text("🧠 LLM: Llama-3.1-8B (Groq)\n📚 Vector DB: Qdrant\n🔍 RAG: LangChain\n🎨 Frontend: Streamlit")
+    
+    if st.button("🗑️ Clear conversation"):
+        st.session_state.messages = []
+        if "memory" in st.session_state:
+            st.session_state.memory.clear()
+        st.rerun()
 
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Per-session conversation memory (the pipeline itself is shared across sessions)
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+
 # Display chat history
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -84,7 +101,7 @@ for message in st.session_state.messages:
         if "sources" in message and message["sources"]:
             with st.expander("📚 Sources"):
                 for src in message["sources"]:
-                    st.text(f"• {src['source']} (Page: {src['page']}, Relevance: {src['score']:.2f})")
+                    st.text(format_source(src))
 
 # Chat input
 if prompt := st.chat_input("Ask me anything about Himanshu..."):
@@ -99,7 +116,7 @@ if prompt := st.chat_input("Ask me anything about Himanshu..."):
             pipeline = load_pipeline()
             
             # Get answer
-            result = pipeline.answer_query(prompt)
+            result = pipeline.answer_query(prompt, memory=st.session_state.memory)
             
             # Display answer
             st.markdown(result['answer'])
@@ -108,7 +125,7 @@ if prompt := st.chat_input("Ask me anything about Himanshu..."):
             if result['sources']:
                 with st.expander("📚 Sources"):
                     for src in result['sources']:
-                        st.text(f"• {src['source']} (Page: {src['page']}, Relevance: {src['score']:.2f})")
+                        st.text(format_source(src))
     
     # Save to history
     st.session_state.messages.append({
@@ -116,6 +133,10 @@ if prompt := st.chat_input("Ask me anything about Himanshu..."):
         "content": result['answer'],
         "sources": result['sources']
     })
+    
+    # Update the conversation summary in the background; the next question waits for it
+    if not result['is_pii_response']:
+        pipeline.update_memory(st.session_state.memory, prompt, result['answer'])
 
 # Footer
 st.markdown("---")
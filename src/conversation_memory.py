@@ -0,0 +1,147 @@
+import re
+import threading
+from src.llm_handler import ERROR_RESPONSE
+from typing import List, Dict, Optional
+
+
+class ConversationMemory:
+    """
+    Bounded per-session conversation state for the RAG pipeline
+
+    Keeps a rolling summary of the conversation (capped by a token budget)
+    instead of the full history, plus the last vector search so it can be
+    reused when a follow-up stays on the same topic.
+    """
+
+    # Phrases that clearly point back to an earlier turn. "he/his" alone is not
+    # one: in this app they always mean Himanshu, so no rewrite is needed.
+    reference_patterns = [
+        r'^\s*(and|what about|how about)\b',
+        r'\btell me more\b',
+        r'\b(the|that|this)\s+(first|second|third|last|other|previous|same)\s+one\b',
+        r'\b(that|this|those|these|the same)\s+(one|ones|project|projects|job|role|company|'
+        r'paper|papers|course|degree|position|internship|topic)\b',
+    ]
+
+    # Bare pronouns only count when the query doesn't name its own subject
+    pronoun_pattern = r'\b(it|its|they|them|their)\b'
+    subject_pattern = r'\b(himanshu|ramteke)\b'
+
+    def __init__(self, max_summary_tokens: int = 200):
+        self.max_summary_tokens = max_summary_tokens
+
+        self.summary = ""
+        self.last_search_query = ""
+        self.last_top_k = None
+        self.last_chunks: List[Dict] = []
+        self.pending_update: Optional[threading.Thread] = None
+        self._encoding = None
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens with tiktoken, falling back to a ~4 chars/token estimate
+        """
+        if self._encoding is None:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                self._encoding = False
+
+        if self._encoding:
+            return len(self._encoding.encode(text))
+        return (len(text) + 3) // 4
+
+    def truncate_to_budget(self, text: str) -> str:
+        """
+        Trim text to the summary token budget, keeping the most recent part
+        """
+        if self.count_tokens(text) <= self.max_summary_tokens:
+            return text
+
+        if self._encoding:
+            tokens = self._encoding.encode(text)
+            return self._encoding.decode(tokens[-self.max_summary_tokens:]).strip()
+        tail = text[-self.max_summary_tokens * 4:]
+        # Drop the partial word at the cut
+        if ' ' in tail and not text[-len(tail) - 1].isspace():
+            tail = tail.split(' ', 1)[1]
+        return tail.strip()
+
+    def refers_back(self, query: str) -> bool:
+        """
+        Check if a query needs earlier turns to be understood
+        """
+        if not self.summary:
+            return False
+
+        query_lower = query.lower()
+        if any(re.search(pattern, query_lower) for pattern in self.reference_patterns):
+            return True
+
+        return (
+            bool(re.search(self.pronoun_pattern, query_lower))
+            and not re.search(self.subject_pattern, query_lower)
+        )
+
+    def cached_chunks(self, top_k: int) -> Optional[List[Dict]]:
+        """
+        Return the last searched chunks, if they were retrieved with the same top_k
+        """
+        if not self.last_chunks or self.last_top_k != top_k:
+            return None
+        return self.last_chunks
+
+    def remember_retrieval(self, search_query: str, chunks: List[Dict], top_k: int):
+        """
+        Store a vector search result (only call this after a real search)
+        """
+        self.last_search_query = search_query
+        self.last_chunks = chunks
+        self.last_top_k = top_k
+
+    def update_summary(self, query: str, answer: str, llm) -> str:
+        """
+        Fold the latest turn into the rolling summary (one LLM call per turn)
+        """
+        if not answer or answer == ERROR_RESPONSE:
+            return self.summary
+
+        prompt = f"""Current conversation summary:
+        {self.summary or "(empty)"}
+
+        Latest exchange:
+        User: {query}
+        Assistant: {answer}
+
+        Update the summary to include the latest exchange. Keep the people, projects, and topics being discussed so follow-up questions can be understood. Use at most {self.max_summary_tokens} tokens.
+
+        Updated summary:"""
+
+        summary = llm.generate_response(
+            prompt,
+            max_tokens=self.max_summary_tokens,
+            temperature=0.0,
+            system_prompt="You maintain a concise running summary of a conversation."
+        )
+        if summary and summary != ERROR_RESPONSE:
+            self.summary = self.truncate_to_budget(summary)
+        return self.summary
+
+    def wait_for_update(self):
+        """
+        Block until a background summary update (if any) has finished
+        """
+        if self.pending_update is not None:
+            self.pending_update.join()
+            self.pending_update = None
+
+    def clear(self):
+        """
+        Reset all conversation state
+        """
+        self.wait_for_update()
+        self.summary = ""
+        self.last_search_query = ""
+        self.last_top_k = None
+        self.last_chunks = []
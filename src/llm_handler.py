@@ -4,6 +4,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_SYSTEM_PROMPT = (
+    "You are a helpful AI assistant that answers questions "
+    "about Himanshu Ramteke based on provided context. "
+    "Be specific, accurate, and concise. If information is "
+    "not in the context, say so politely."
+)
+ERROR_RESPONSE = "I apologize, but I encountered an error generating a response. Please try again."
+
 class LLMHandler:
     """
     Handle LLM calls via Groq (FREE API)
@@ -21,7 +29,8 @@ class LLMHandler:
         self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
         self.model = model
     
-    def generate_response(self, prompt: str, max_tokens: int = 500, temperature: float = 0.7) -> str:
+    def generate_response(self, prompt: str, max_tokens: int = 500, temperature: float = 0.7,
+                          system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> str:
         """
         Generate response using Groq
         """
@@ -30,12 +39,7 @@ class LLMHandler:
                 messages=[
                     {
                         "role": "system",
-                        "content": (
-                            "You are a helpful AI assistant that answers questions "
-                            "about Himanshu Ramteke based on provided context. "
-                            "Be specific, accurate, and concise. If information is "
-                            "not in the context, say so politely."
-                        )
+                        "content": system_prompt
                     },
                     {
                         "role": "user",
@@ -52,4 +56,4 @@ class LLMHandler:
         
         except Exception as e:
             print(f"Error calling Groq API: {e}")
-            return "I apologize, but I encountered an error generating a response. Please try again."
+            return ERROR_RESPONSE
@@ -1,8 +1,11 @@
+import re
+import threading
 from src.embeddings import EmbeddingGenerator
 from src.vector_store import VectorStore
-from src.llm_handler import LLMHandler
+from src.llm_handler import LLMHandler, ERROR_RESPONSE
 from src.privacy_filter import PrivacyFilter
-from typing import Dict
+from src.conversation_memory import ConversationMemory
+from typing import Dict, Optional, Tuple
 
 class RAGPipeline:
     """
@@ -15,10 +18,60 @@ class RAGPipeline:
         self.llm = LLMHandler()
         self.privacy = PrivacyFilter()
     
-    def answer_query(self, query: str, top_k: int = 3) -> Dict:
+    def rewrite_query(self, query: str, memory: ConversationMemory) -> Tuple[str, bool]:
         """
-        Complete pipeline: query → retrieve → generate
+        Turn a follow-up question into a standalone one using the conversation summary
+        
+        Returns the standalone question and whether the documents found for the
+        previous search query can still answer it. Queries that don't refer back
+        to earlier turns are returned unchanged without an LLM call.
+        """
+        if not memory.refers_back(query):
+            return query, False
+        
+        prompt = f"""Conversation summary:
+        {memory.summary}
+
+        Previous search query: {memory.last_search_query or "(none)"}
+
+        Follow-up question: {query}
+
+        Rewrite the follow-up question as a standalone question that can be understood without the conversation. Resolve pronouns and references using the summary. Then decide whether documents retrieved for the previous search query would answer it (same specific topic, not just the same person).
+
+        Reply in exactly this format:
+        SAME_TOPIC: yes or no
+        QUESTION: <standalone question>"""
+        
+        response = self.llm.generate_response(
+            prompt,
+            max_tokens=100,
+            temperature=0.0,
+            system_prompt="You rewrite follow-up questions into standalone search queries."
+        )
+        
+        if not response or response == ERROR_RESPONSE:
+            return query, False
+        
+        same_topic_match = re.search(r'SAME_TOPIC:\s*(yes|no)', response, re.IGNORECASE)
+        question_match = re.search(r'QUESTION:\s*(.+)', response, re.IGNORECASE)
+        if not question_match or not question_match.group(1).strip():
+            return query, False
+        
+        same_topic = bool(same_topic_match) and same_topic_match.group(1).lower() == 'yes'
+        return question_match.group(1).strip(), same_topic and bool(memory.last_search_query)
+    
+    def answer_query(self, query: str, top_k: int = 3, memory: Optional[ConversationMemory] = None) -> Dict:
+        """
+        Complete pipeline: query → (rewrite) → retrieve → generate
+        
+        If a ConversationMemory is given, follow-up questions are rewritten
+        from its rolling summary and the last search is reused when the
+        rewrite step says the topic is unchanged. The caller is expected to
+        call update_memory() once the answer has been shown.
         """
+        if memory:
+            memory.wait_for_update()
+        
         # Step 1: Check for PII request
         if self.privacy.is_pii_request(query):
             return {
@@ -27,35 +80,62 @@ class RAGPipeline:
                 'is_pii_response': True
             }
         
-        # Step 2: Generate query embedding
-        query_embedding = self.embedder.embed_query(query)
+        # Step 2: Rewrite follow-ups into standalone queries
+        search_query, same_topic = self.rewrite_query(query, memory) if memory else (query, False)
         
-        # Step 3: Retrieve relevant chunks
-        retrieved_chunks = self.vector_store.search(
-            query_embedding=query_embedding.tolist(),
-            top_k=top_k
-        )
+        # A vague follow-up can turn into a PII request once rewritten
+        if search_query != query and self.privacy.is_pii_request(search_query):
+            return {
+                'answer': self.privacy.handle_pii_request(search_query),
+                'sources': [],
+                'is_pii_response': True
+            }
+        
+        # Step 3: Reuse the last search if the topic is unchanged
+        retrieved_chunks = memory.cached_chunks(top_k) if memory and same_topic else None
+        reused = retrieved_chunks is not None
         
-        # Step 4: Build prompt with context
+        if not reused:
+            # Step 4: Generate query embedding and retrieve relevant chunks
+            query_embedding = self.embedder.embed_query(search_query)
+            retrieved_chunks = self.vector_store.search(
+                query_embedding=query_embedding.tolist(),
+                top_k=top_k
+            )
+            if memory:
+                memory.remember_retrieval(search_query, retrieved_chunks, top_k)
+        
+        # Step 5: Build prompt with context
         context = "\n\n".join([
             f"[Source: {chunk['source']}, Page: {chunk['page']}]\n{chunk['text']}"
             for chunk in retrieved_chunks
         ])
         
-        prompt = f"""Context information from Himanshu's documents:
+        history = ""
+        if memory and memory.summary:
+            history = f"""Conversation history (only for understanding what the user refers to; NOT a source of facts):
+        {memory.summary}
+
+        """
+        
+        question = query
+        if search_query != query:
+            question = f"{query}\n        (Interpreted as: {search_query})"
+        
+        prompt = f"""{history}Context information from Himanshu's documents:
 
         {context}
 
-        Question: {query}
+        Question: {question}
 
-        Based ONLY on the context above, provide a clear and accurate answer. If the information is not in the context, say "I don't have that information in the documents provided."
+        Based ONLY on the document context above, provide a clear and accurate answer. If the information is not in the context, say "I don't have that information in the documents provided."
 
         Answer:"""
         
-        # Step 5: Generate response
+        # Step 6: Generate response
         answer = self.llm.generate_response(prompt)
         
-        # Step 6: Redact any leaked PII
+        # Step 7: Redact any leaked PII
         answer = self.privacy.redact_pii_from_text(answer)
         
         return {
@@ -64,9 +144,26 @@ class RAGPipeline:
                 {
                     'source': chunk['source'],
                     'page': chunk['page'],
-                    'score': chunk['score']
+                    'score': chunk['score'],
+                    'reused': reused
                 }
                 for chunk in retrieved_chunks
             ],
             'is_pii_response': False
         }
+    
+    def update_memory(self, memory: ConversationMemory, query: str, answer: str) -> threading.Thread:
+        """
+        Fold a finished turn into the conversation summary in the background
+        
+        The summary LLM call runs on a separate thread so it doesn't hold up
+        the current response; the next answer_query() waits for it.
+        """
+        memory.wait_for_update()
+        memory.pending_update = threading.Thread(
+            target=memory.update_summary,
+            args=(query, answer, self.llm),
+            daemon=True
+        )
+        memory.pending_update.start()
+        return memory.pending_update
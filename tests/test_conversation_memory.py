@@ -0,0 +1,212 @@
+import numpy as np
+from src.conversation_memory import ConversationMemory
+from src.llm_handler import ERROR_RESPONSE
+from src.privacy_filter import PrivacyFilter
+from src.rag_pipeline import RAGPipeline
+
+
+class StubLLM:
+    """
+    Records prompts and returns canned responses in order
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_response(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+class StubEmbedder:
+    def embed_query(self, query):
+        return np.zeros(384)
+
+
+class StubVectorStore:
+    def __init__(self):
+        self.searches = 0
+
+    def search(self, query_embedding, top_k=3):
+        self.searches += 1
+        return [
+            {'text': f'chunk {self.searches}-{i}', 'source': 'resume.pdf', 'page': 'page_1',
+             'score': 0.5, 'has_pii': False}
+            for i in range(top_k)
+        ]
+
+
+class StubPrivacy:
+    def is_pii_request(self, query):
+        return False
+
+    def redact_pii_from_text(self, text):
+        return text
+
+
+def make_pipeline(llm):
+    pipeline = RAGPipeline.__new__(RAGPipeline)
+    pipeline.embedder = StubEmbedder()
+    pipeline.vector_store = StubVectorStore()
+    pipeline.llm = llm
+    pipeline.privacy = StubPrivacy()
+    return pipeline
+
+
+def test_truncate_to_budget_keeps_recent_text():
+    memory = ConversationMemory(max_summary_tokens=20)
+    text = "old " * 100 + "recent ending"
+
+    truncated = memory.truncate_to_budget(text)
+
+    assert memory.count_tokens(truncated) <= 20
+    assert truncated.endswith("recent ending")
+    assert memory.truncate_to_budget("short") == "short"
+
+
+def test_update_summary_is_bounded_and_ignores_errors():
+    memory = ConversationMemory(max_summary_tokens=30)
+
+    memory.update_summary("q", "a", StubLLM("word " * 500))
+    assert memory.count_tokens(memory.summary) <= 30
+
+    previous = memory.summary
+    memory.update_summary("q", "a", StubLLM(ERROR_RESPONSE))
+    assert memory.summary == previous
+
+    llm = StubLLM()
+    memory.update_summary("q", ERROR_RESPONSE, llm)
+    assert memory.summary == previous
+    assert llm.prompts == []
+
+
+def test_cached_chunks_requires_same_top_k():
+    memory = ConversationMemory()
+    assert memory.cached_chunks(3) is None
+
+    memory.remember_retrieval("projects", [{'text': 'x'}], top_k=3)
+    assert memory.cached_chunks(3) == [{'text': 'x'}]
+    assert memory.cached_chunks(5) is None
+
+    memory.clear()
+    assert memory.cached_chunks(3) is None
+    assert memory.summary == ""
+
+
+def test_rewrite_skipped_without_summary_or_reference():
+    llm = StubLLM()
+    pipeline = make_pipeline(llm)
+    memory = ConversationMemory()
+
+    assert pipeline.rewrite_query("What about his second project?", memory) == (
+        "What about his second project?", False
+    )
+
+    memory.summary = "Discussed Himanshu's forecasting project."
+    assert pipeline.rewrite_query("Where did Himanshu study?", memory) == (
+        "Where did Himanshu study?", False
+    )
+    assert llm.prompts == []
+
+
+def test_rewrite_falls_back_on_error_or_bad_format():
+    memory = ConversationMemory()
+    memory.summary = "Discussed Himanshu's forecasting project."
+    memory.remember_retrieval("forecasting project", [{'text': 'x'}], top_k=3)
+
+    pipeline = make_pipeline(StubLLM(ERROR_RESPONSE, "no format here"))
+    assert pipeline.rewrite_query("Tell me more about it", memory) == ("Tell me more about it", False)
+    assert pipeline.rewrite_query("Tell me more about it", memory) == ("Tell me more about it", False)
+
+
+def test_reuse_follows_same_topic_flag_not_embedding_similarity():
+    memory = ConversationMemory()
+    memory.summary = "Discussed Himanshu's work experience."
+    llm = StubLLM(
+        "SAME_TOPIC: yes\nQUESTION: What tools did Himanshu use in his work experience?",
+        "answer 1",
+        "SAME_TOPIC: no\nQUESTION: What is Himanshu's education background?",
+        "answer 2",
+        "SAME_TOPIC: yes\nQUESTION: What courses did Himanshu take in his degree?",
+        "answer 3",
+    )
+    pipeline = make_pipeline(llm)
+    memory.remember_retrieval("What is Himanshu's work experience?", [
+        {'text': 'old', 'source': 'resume.pdf', 'page': 'page_1', 'score': 0.9}
+    ], top_k=3)
+
+    # Same topic: reuses the work-experience chunks and keeps the query that produced them
+    result = pipeline.answer_query("What tools did he use in that role?", memory=memory)
+    assert pipeline.vector_store.searches == 0
+    assert all(src['reused'] for src in result['sources'])
+    assert memory.last_search_query == "What is Himanshu's work experience?"
+
+    # Topic changed: searches again and remembers the new query
+    result = pipeline.answer_query("And his education?", memory=memory)
+    assert pipeline.vector_store.searches == 1
+    assert not any(src['reused'] for src in result['sources'])
+    assert memory.last_search_query == "What is Himanshu's education background?"
+
+    # Same topic but a different top_k: searches again
+    result = pipeline.answer_query("What courses were in that degree?", top_k=5, memory=memory)
+    assert pipeline.vector_store.searches == 2
+    assert len(result['sources']) == 5
+
+
+def test_standalone_question_makes_no_rewrite_call():
+    memory = ConversationMemory()
+    memory.summary = "Discussed Himanshu's forecasting project."
+    llm = StubLLM("answer 1", "answer 2")
+    pipeline = make_pipeline(llm)
+
+    pipeline.answer_query("What are his skills?", memory=memory)
+    pipeline.answer_query("Which of Himanshu's projects use it?", memory=memory)
+
+    assert len(llm.prompts) == 2
+    assert pipeline.vector_store.searches == 2
+    assert memory.refers_back("What about the second one?")
+    assert memory.refers_back("Which libraries did it use?")
+
+
+def test_rewritten_pii_request_is_blocked():
+    memory = ConversationMemory()
+    memory.summary = "Discussed how to get in touch with Himanshu by email."
+    llm = StubLLM("SAME_TOPIC: no\nQUESTION: What is Himanshu's home address and phone number?")
+    pipeline = make_pipeline(llm)
+    pipeline.privacy = PrivacyFilter()
+
+    query = "And the other way to reach him?"
+    assert not pipeline.privacy.is_pii_request(query)
+
+    result = pipeline.answer_query(query, memory=memory)
+
+    assert result['is_pii_response']
+    assert result['sources'] == []
+    assert pipeline.vector_store.searches == 0
+    assert len(llm.prompts) == 1
+
+
+def test_update_memory_runs_in_background():
+    memory = ConversationMemory()
+    pipeline = make_pipeline(StubLLM("Discussed Himanshu's skills."))
+
+    pipeline.update_memory(memory, "What are his skills?", "Python and SQL.")
+    memory.wait_for_update()
+
+    assert memory.summary == "Discussed Himanshu's skills."
+    assert memory.pending_update is None
+
+
+def test_prompt_keeps_original_query_and_labels_history():
+    memory = ConversationMemory()
+    memory.summary = "Discussed Himanshu's forecasting project."
+    llm = StubLLM("SAME_TOPIC: no\nQUESTION: What models were used in the forecasting project?", "answer")
+    pipeline = make_pipeline(llm)
+
+    pipeline.answer_query("Which models did it use?", memory=memory)
+
+    prompt = llm.prompts[-1]
+    assert "Which models did it use?" in prompt
+    assert "What models were used in the forecasting project?" in prompt
+    assert prompt.index("NOT a source of facts") < prompt.index("Context information")